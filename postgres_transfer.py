@@ -8,11 +8,77 @@ import os
 import sys
 import subprocess
 import json
+import re
 import getpass
-from typing import List, Dict, Optional
+import shutil
+import signal
+from typing import BinaryIO, List, Dict, Optional, Tuple
 import tempfile
-from datetime import datetime
+import threading
 import configparser
+from datetime import datetime
+from functools import lru_cache
+
+# ANSI color codes
+BOLD = '\033[1m'
+RESET = '\033[0m'
+RED = '\033[91m'
+GREEN = '\033[92m'
+
+# Recognize real PostgreSQL images
+_POSTGRES_IMAGE_RE = re.compile(r"""
+    postgres:               # Official PostgreSQL image with tag
+  | postgres/               # PostgreSQL with namespace
+  | postgresql              # Alternative PostgreSQL images
+  | postgres                # Official PostgreSQL image without tag
+  | bitnami/postgresql      # Bitnami PostgreSQL
+  | postgis/postgis         # PostGIS (based on PostgreSQL)
+  | timescale/timescaledb   # TimescaleDB (based on PostgreSQL)
+""", re.VERBOSE)
+
+# Applications that only use PostgreSQL
+_APPLICATION_IMAGE_RE = re.compile(r"""
+    umami        # Umami Analytics
+  | nextcloud    # Nextcloud
+  | wordpress    # WordPress
+  | drupal       # Drupal
+  | gitlab       # GitLab
+  | sonarqube    # SonarQube
+  | keycloak     # Keycloak
+  | superset     # Apache Superset
+  | metabase     # Metabase
+  | grafana      # Grafana
+  | hasura       # Hasura
+  | supabase     # Supabase
+  | directus     # Directus
+  | strapi       # Strapi
+""", re.VERBOSE)
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.ini')
+
+
+@lru_cache(maxsize=None)
+def _read_config(config_file: str, mtime: Optional[float]) -> configparser.ConfigParser:
+    """Parses config.ini; cached per modification time"""
+    config = configparser.ConfigParser()
+    
+    if mtime is not None:
+        config.read(config_file)
+    else:
+        # Default values if config file doesn't exist
+        config['host'] = {
+            'host': 'localhost',
+            'port': '5432',
+            'username': 'postgres'
+        }
+        config['transfer'] = {
+            'dump_options': '--format=custom --compress=3 --no-owner --no-privileges',
+            'keep_dump': 'false',
+            'timeout': '10'
+        }
+    
+    return config
+
 
 class PostgreSQLTransfer:
     def __init__(self):
@@ -20,60 +86,60 @@ class PostgreSQLTransfer:
         self.selected_container = None
         self.connection_params = {}
         self.databases = []
+        self.database_listing = None
         self.selected_database = None
         self.config = self.load_config()
     
     def load_config(self) -> configparser.ConfigParser:
         """Load configuration from config.ini"""
-        config = configparser.ConfigParser()
-        config_file = os.path.join(os.path.dirname(__file__), 'config.ini')
+        try:
+            mtime = os.path.getmtime(CONFIG_FILE)
+        except OSError:
+            mtime = None
         
-        if os.path.exists(config_file):
-            config.read(config_file)
-        else:
-            # Default values if config file doesn't exist
-            config['host'] = {
-                'host': 'localhost',
-                'port': '5432',
-                'username': 'postgres'
-            }
-            config['transfer'] = {
-                'dump_options': '--no-owner --no-privileges',
-                'timeout': '10'
-            }
-        
-        return config
+        return _read_config(CONFIG_FILE, mtime)
         
     def check_dependencies(self) -> bool:
         """Checks if all required programs are available"""
         # Check Docker
-        try:
-            subprocess.run(['docker', '--version'], capture_output=True, text=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if shutil.which('docker') is None:
             print("❌ Docker not available")
             return False
             
         # Check PostgreSQL client
-        try:
-            subprocess.run(['psql', '--version'], capture_output=True, text=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if shutil.which('psql') is None:
             print("❌ PostgreSQL client not installed")
             return False
             
         # Check pg_dump
-        try:
-            subprocess.run(['pg_dump', '--version'], capture_output=True, text=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if shutil.which('pg_dump') is None:
             print("❌ pg_dump not available")
             return False
             
+        # Check pg_restore
+        if shutil.which('pg_restore') is None:
+            print("❌ pg_restore not available")
+            return False
+            
+        # Check decompressor for compressed plain SQL dumps
+        decompress_command = self._build_decompress_command(self.get_dump_options())
+        if decompress_command and shutil.which(decompress_command[0]) is None:
+            print(f"❌ {decompress_command[0]} not available (needed to decompress the dump)")
+            return False
+            
         return True
     
     def check_docker_running(self) -> bool:
         """Checks if Docker is running"""
+        timeout = self.config.getint('transfer', 'timeout', fallback=10)
+        
         try:
-            subprocess.run(['docker', 'info'], capture_output=True, text=True, check=True)
+            # Output is not needed, only the exit status
+            subprocess.run(['docker', 'info'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, timeout=timeout)
             return True
+        except subprocess.TimeoutExpired:
+            print(f"❌ Docker did not respond within {timeout} seconds")
+            return False
         except subprocess.CalledProcessError as e:
             print("❌ Docker not running or permission denied")
             print("Try: sudo python3 postgres_transfer.py")
@@ -83,42 +149,31 @@ class PostgreSQLTransfer:
     def find_postgres_containers(self) -> List[Dict]:
         """Finds all running PostgreSQL Docker containers"""
         try:
-            # Get all running containers in JSON format (easier to parse)
+            # Get running containers exposing the PostgreSQL port in JSON format (easier to parse)
             result = subprocess.run([
-                'docker', 'ps', '--format', 'json'
+                'docker', 'ps', '--filter', 'expose=5432', '--format', '{{json .}}'
             ], capture_output=True, text=True, check=True)
             
             containers = []
+            decoder = json.JSONDecoder()
             
             # Each line is a separate JSON object
-            for line in result.stdout.strip().split('\n'):
+            for line in result.stdout.splitlines():
                 if line.strip():
                     try:
-                        container_data = json.loads(line)
-                        container_id = container_data.get('ID', '')
-                        name = container_data.get('Names', '')
+                        container_data = decoder.decode(line)
                         image = container_data.get('Image', '')
-                        status = container_data.get('Status', '')
                         ports = container_data.get('Ports', '')
                         
                         # Identify PostgreSQL containers - only real PostgreSQL servers
                         if self._is_postgres_database_server(image, ports):
-                            # Get additional container details
-                            inspect_result = subprocess.run([
-                                'docker', 'inspect', container_id
-                            ], capture_output=True, text=True, check=True)
-                            
-                            inspect_data = json.loads(inspect_result.stdout)[0]
-                            
-                            container_info = {
-                                'id': container_id,
-                                'name': name,
+                            containers.append({
+                                'id': container_data.get('ID', ''),
+                                'name': container_data.get('Names', ''),
                                 'image': image,
-                                'status': status,
-                                'ports': ports,
-                                'env_vars': inspect_data.get('Config', {}).get('Env', [])
-                            }
-                            containers.append(container_info)
+                                'status': container_data.get('Status', ''),
+                                'ports': ports
+                            })
                         elif any(keyword in image.lower() for keyword in ['postgresql']):
                             pass  # Skip applications
                             
@@ -136,11 +191,11 @@ class PostgreSQLTransfer:
                 
                 # Check if any containers are running at all
                 if result.stdout.strip():
-                    print("Running containers found, but none are recognized as PostgreSQL servers")
+                    print("Containers exposing port 5432 found, but none are recognized as PostgreSQL servers")
                     print("Supported images: postgres, postgres:*, postgis/postgis, timescale/timescaledb, bitnami/postgresql")
                     print("Check your container images with: docker ps")
                 else:
-                    print("No containers are currently running")
+                    print("No running containers expose port 5432")
                     print("Start your PostgreSQL container first")
             
             return containers
@@ -154,11 +209,11 @@ class PostgreSQLTransfer:
         try:
             # Standard docker ps without special formatting
             result = subprocess.run([
-                'docker', 'ps'
+                'docker', 'ps', '--filter', 'expose=5432'
             ], capture_output=True, text=True, check=True)
             
             containers = []
-            lines = result.stdout.strip().split('\n')[1:]  # Skip header
+            lines = result.stdout.splitlines()[1:]  # Skip header
             
             for line in lines:
                 if line.strip():
@@ -172,30 +227,15 @@ class PostgreSQLTransfer:
                         # Name is always the last element
                         name = parts[-1]
                         
-                        # Status and ports can contain multiple words
-                        # Simplified extraction
-                        status_start = 4
-                        ports_and_names = ' '.join(parts[status_start:])
-                        
                         # Identify PostgreSQL containers - only real PostgreSQL servers
                         if self._is_postgres_database_server(image, ''):
-                            
-                            # Get additional container details
-                            inspect_result = subprocess.run([
-                                'docker', 'inspect', container_id
-                            ], capture_output=True, text=True, check=True)
-                            
-                            inspect_data = json.loads(inspect_result.stdout)[0]
-                            
-                            container_info = {
+                            containers.append({
                                 'id': container_id,
                                 'name': name,
                                 'image': image,
                                 'status': 'running',  # Simplified, since all ps containers are running
-                                'ports': '',  # Will be extracted from inspect_data later if needed
-                                'env_vars': inspect_data.get('Config', {}).get('Env', [])
-                            }
-                            containers.append(container_info)
+                                'ports': ''  # Not available in standard format
+                            })
                         elif any(keyword in image.lower() for keyword in ['postgresql']):
                             print(f"  ⚠️  Skipping application with PostgreSQL: {name} ({image})")
             
@@ -209,43 +249,11 @@ class PostgreSQLTransfer:
         """Checks if this is a real PostgreSQL database server"""
         image_lower = image.lower()
         
-        # Recognize real PostgreSQL images
-        postgres_server_patterns = [
-            'postgres:',           # Official PostgreSQL image with tag
-            'postgres',            # Official PostgreSQL image without tag
-            'postgresql:',         # Alternative PostgreSQL images
-            'postgresql',          # Alternative PostgreSQL images without tag
-            'postgres/',           # PostgreSQL with namespace
-            'bitnami/postgresql',  # Bitnami PostgreSQL
-            'postgis/postgis',     # PostGIS (based on PostgreSQL)
-            'timescale/timescaledb' # TimescaleDB (based on PostgreSQL)
-        ]
-        
         # Check if it's a real PostgreSQL server image
-        is_postgres_server = any(
-            pattern in image_lower or image_lower == pattern.rstrip(':') 
-            for pattern in postgres_server_patterns
-        )
+        is_postgres_server = _POSTGRES_IMAGE_RE.search(image_lower) is not None
         
         # Exclude applications that only use PostgreSQL
-        exclude_patterns = [
-            'umami',              # Umami Analytics
-            'nextcloud',          # Nextcloud
-            'wordpress',          # WordPress
-            'drupal',             # Drupal
-            'gitlab',             # GitLab
-            'sonarqube',          # SonarQube
-            'keycloak',           # Keycloak
-            'superset',           # Apache Superset
-            'metabase',           # Metabase
-            'grafana',            # Grafana
-            'hasura',             # Hasura
-            'supabase',           # Supabase
-            'directus',           # Directus
-            'strapi'              # Strapi
-        ]
-        
-        is_application = any(pattern in image_lower for pattern in exclude_patterns)
+        is_application = _APPLICATION_IMAGE_RE.search(image_lower) is not None
         
         # Additional check: PostgreSQL port 5432 should be exposed
         has_postgres_port = '5432' in ports if ports else True  # True if ports empty (will be checked later)
@@ -262,8 +270,6 @@ class PostgreSQLTransfer:
         if not self.postgres_containers:
             return False
             
-        BOLD = '\033[1m'
-        RESET = '\033[0m'
         print(f"{BOLD}PostgreSQL containers:{RESET}")
         for i, container in enumerate(self.postgres_containers, 1):
             print(f"{i}) {container['name']} ({container['image']})")
@@ -289,19 +295,18 @@ class PostgreSQLTransfer:
     def get_connection_details(self) -> bool:
         """Gets database connection credentials"""
         # Derive default values from container environment variables
-        env_vars = self.selected_container.get('env_vars', [])
+        env_vars = self._get_container_env(self.selected_container['id'])
         default_user = 'postgres'
         default_port = '5432'
         
         for env_var in env_vars:
-            if env_var.startswith('POSTGRES_USER='):
-                default_user = env_var.split('=', 1)[1]
-            elif env_var.startswith('PGPORT='):
-                default_port = env_var.split('=', 1)[1]
+            key, _, value = env_var.partition('=')
+            if key == 'POSTGRES_USER':
+                default_user = value
+            elif key == 'PGPORT':
+                default_port = value
         
         # User inputs
-        BOLD = '\033[1m'
-        RESET = '\033[0m'
         print()
         print(f"{BOLD}Connection details for {self.selected_container['name']}:{RESET}")
         host = input(f"Host (default: localhost): ").strip() or 'localhost'
@@ -314,28 +319,150 @@ class PostgreSQLTransfer:
             'port': port,
             'username': username,
             'password': password,
-            'container_id': self.selected_container['id']
+            'container_id': self.selected_container['id'],
+            # Environment for all client processes, built once per run
+            'env': {**os.environ, 'PGPASSWORD': password},
+            # Published host address of the server, if reachable without docker exec
+            'published_address': self._get_published_address(host, port)
         }
         
         return True
     
+    def _get_published_address(self, host: str, port: str) -> Optional[Tuple[str, str]]:
+        """Returns the host address/port mapped to the container's PostgreSQL port"""
+        # Only the server running inside the container itself can be reached via its port mapping
+        if host not in ('localhost', '127.0.0.1', '::1'):
+            return None
+        
+        # Docker formats ports as e.g. "0.0.0.0:5433->5432/tcp, :::5433->5432/tcp"
+        for mapping in self.selected_container.get('ports', '').split(','):
+            published, _, target = mapping.strip().partition('->')
+            if target != f"{port}/tcp":
+                continue
+            
+            host_ip, _, host_port = published.rpartition(':')
+            host_ip = host_ip.strip('[]')
+            if host_ip in ('', '0.0.0.0', '::'):
+                host_ip = 'localhost'
+            if host_port:
+                return host_ip, host_port
+        
+        return None
+    
+    def _build_source_command(self, program: str, database: str) -> List[str]:
+        """Builds a psql/pg_dump command against the container database"""
+        published_address = self.connection_params.get('published_address')
+        
+        if published_address:
+            # Connect directly from the host through the published port
+            host, port = published_address
+            prefix = [program]
+        else:
+            # No published port: run the client inside the container
+            host, port = self.connection_params['host'], self.connection_params['port']
+            prefix = ['docker', 'exec', '-i', self.selected_container['id'], program]
+        
+        return prefix + [
+            '-h', host,
+            '-p', port,
+            '-U', self.connection_params['username'],
+            '-d', database
+        ]
+    
+    def _parse_server_version(self, version_num: str) -> Optional[Tuple[int, int]]:
+        """Converts server_version_num (e.g. 160002 or 90624) into a major version"""
+        if not version_num.isdigit():
+            return None
+        
+        num = int(version_num)
+        # Before PostgreSQL 10 the major version has two parts (e.g. 9.6)
+        return (num // 10000, 0) if num >= 100000 else (num // 10000, num // 100 % 100)
+    
+    def _format_version(self, version: Tuple[int, int]) -> str:
+        """Formats a major version as PostgreSQL names it (e.g. 9.6 or 16)"""
+        major, minor = version
+        return f"{major}.{minor}" if major < 10 else str(major)
+    
+    def _get_client_version(self, program: str) -> Optional[Tuple[int, int]]:
+        """Returns the major version of a host PostgreSQL client program"""
+        try:
+            result = subprocess.run([program, '--version'], capture_output=True, text=True, check=True)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        
+        # e.g. "pg_dump (PostgreSQL) 16.2" or "pg_dump (PostgreSQL) 9.6.24"
+        match = re.search(r'(\d+)(?:\.(\d+))?', result.stdout)
+        if not match:
+            return None
+        
+        major, minor = int(match.group(1)), int(match.group(2) or 0)
+        return (major, 0) if major >= 10 else (major, minor)
+    
+    def _client_supports(self, program: str, server_version: Optional[Tuple[int, int]]) -> bool:
+        """Checks if a host client program is at least as new as the container server"""
+        if server_version is None:
+            return True
+        
+        client_version = self._get_client_version(program)
+        return client_version is not None and client_version >= server_version
+    
+    def _get_container_env(self, container_id: str) -> List[str]:
+        """Reads environment variables of the selected container only"""
+        try:
+            result = subprocess.run([
+                'docker', 'inspect', '--format', '{{json .Config.Env}}', container_id
+            ], capture_output=True, text=True, check=True)
+            
+            return json.loads(result.stdout) or []
+            
+        except (subprocess.CalledProcessError, json.JSONDecodeError):
+            return []
+    
     def test_connection(self) -> bool:
         """Tests the database connection"""
         try:
-            env = os.environ.copy()
-            env['PGPASSWORD'] = self.connection_params['password']
-            
-            result = subprocess.run([
-                'docker', 'exec', '-i', self.selected_container['id'],
-                'psql', 
-                '-h', self.connection_params['host'],
-                '-p', self.connection_params['port'],
-                '-U', self.connection_params['username'],
-                '-d', 'postgres',
-                '-c', 'SELECT version();'
-            ], env=env, capture_output=True, text=True, timeout=10)
+            # Listing the databases doubles as the connection test, saving a second session
+            query_args = [
+                '-t',
+                '-c', 'SHOW server_version_num;',
+                '-c', "SELECT datname FROM pg_database WHERE datistemplate = false AND datname != 'postgres';"
+            ]
+            result = subprocess.run(
+                self._build_source_command('psql', 'postgres') + query_args,
+                env=self.connection_params['env'], capture_output=True, text=True, timeout=10
+            )
+            
+            if result.returncode != 0 and self.connection_params.get('published_address'):
+                # The published port goes through the image's password rules, while docker exec
+                # connects over the container's loopback, which is usually trusted
+                print("Connection through the published port failed, using docker exec instead")
+                self.connection_params['published_address'] = None
+                result = subprocess.run(
+                    self._build_source_command('psql', 'postgres') + query_args,
+                    env=self.connection_params['env'], capture_output=True, text=True, timeout=10
+                )
             
             if result.returncode == 0:
+                # First row is the server version, the rest is the database list
+                rows = [row.strip() for row in result.stdout.splitlines() if row.strip()]
+                self.connection_params['server_version'] = self._parse_server_version(rows[0]) if rows else None
+                self.database_listing = '\n'.join(rows[1:])
+                
+                # pg_dump refuses to dump servers newer than itself, so use the container's own
+                if (self.connection_params.get('published_address')
+                        and not self._client_supports('pg_dump', self.connection_params['server_version'])):
+                    print("Host pg_dump is older than the container server, using docker exec instead")
+                    self.connection_params['published_address'] = None
+                
+                # On the docker exec path the container's pg_dump writes the archive,
+                # which an older host pg_restore cannot read
+                if (not self.connection_params.get('published_address')
+                        and self._is_custom_format(self.get_dump_options())
+                        and not self._client_supports('pg_restore', self.connection_params['server_version'])):
+                    server_version = self._format_version(self.connection_params['server_version'])
+                    print(f"❌ Host client tools are older than the container server (PostgreSQL {server_version})")
+                    print("Install PostgreSQL client tools of at least the server version on the host")
+                    return False
                 return True
             else:
                 print(f"Connection failed: {result.stderr}")
@@ -350,49 +477,28 @@ class PostgreSQLTransfer:
     
     def list_databases(self) -> bool:
         """Lists all available databases"""
-        try:
-            env = os.environ.copy()
-            env['PGPASSWORD'] = self.connection_params['password']
-            
-            result = subprocess.run([
-                'docker', 'exec', '-i', self.selected_container['id'],
-                'psql',
-                '-h', self.connection_params['host'],
-                '-p', self.connection_params['port'],
-                '-U', self.connection_params['username'],
-                '-d', 'postgres',
-                '-t', '-c',
-                "SELECT datname FROM pg_database WHERE datistemplate = false AND datname != 'postgres';"
-            ], env=env, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                databases = [db.strip() for db in result.stdout.strip().split('\n') if db.strip()]
-                
-                # Add postgres database if not present
-                if 'postgres' not in databases:
-                    databases.insert(0, 'postgres')
-                
-                self.databases = databases
-                
-                if not databases:
-                    print("No databases found")
-                    return False
-                return True
-            else:
-                print(f"Error loading databases: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            print(f"Error loading databases: {e}")
+        # The listing is fetched by test_connection
+        if self.database_listing is None and not self.test_connection():
+            return False
+        
+        databases = [db.strip() for db in self.database_listing.splitlines() if db.strip()]
+        
+        # Add postgres database if not present
+        if 'postgres' not in databases:
+            databases.insert(0, 'postgres')
+        
+        self.databases = databases
+        
+        if not databases:
+            print("No databases found")
             return False
+        return True
     
     def select_database(self) -> bool:
         """Lets user select a database"""
         if not self.databases:
             return False
             
-        BOLD = '\033[1m'
-        RESET = '\033[0m'
         print()
         print(f"{BOLD}Available databases:{RESET}")
         for i, db in enumerate(self.databases, 1):
@@ -418,8 +524,6 @@ class PostgreSQLTransfer:
     
     def show_transfer_overview(self) -> bool:
         """Shows overview of the planned transfer"""
-        BOLD = '\033[1m'
-        RESET = '\033[0m'
         print()
         print(f"{BOLD}Transfer: {self.selected_database} from {self.selected_container['name']}{RESET}")
         
@@ -442,10 +546,12 @@ class PostgreSQLTransfer:
         # Only ask for password
         host_password = getpass.getpass(f"Host PostgreSQL password for {host_username}@{host_host}: ")
         
-        # Test host connection
+        # Test host connection by checking whether the target database already exists
+        # psql only interpolates :'dbname' in script input, not in -c commands, and exits 0
+        # on a failed script query unless ON_ERROR_STOP is set
         try:
-            env = os.environ.copy()
-            env['PGPASSWORD'] = host_password
+            # Environment for all host client processes, built once per run
+            env = {**os.environ, 'PGPASSWORD': host_password}
             
             result = subprocess.run([
                 'psql',
@@ -453,15 +559,19 @@ class PostgreSQLTransfer:
                 '-p', host_port,
                 '-U', host_username,
                 '-d', 'postgres',
-                '-c', 'SELECT version();'
-            ], env=env, capture_output=True, text=True, timeout=10)
+                '-v', 'ON_ERROR_STOP=1',
+                '-v', f'dbname={self.selected_database}',
+                '-t', '-f', '-'
+            ], env=env, input="SELECT 1 FROM pg_database WHERE datname = :'dbname';\n", capture_output=True, text=True, timeout=10)
             
             if result.returncode == 0:
                 return {
                     'host': host_host,
                     'port': host_port,
                     'username': host_username,
-                    'password': host_password
+                    'password': host_password,
+                    'env': env,
+                    'database_exists': bool(result.stdout.strip())
                 }
             else:
                 print(f"Host connection failed: {result.stderr}")
@@ -471,6 +581,157 @@ class PostgreSQLTransfer:
             print(f"Host connection error: {e}")
             return None
     
+    def get_dump_options(self) -> List[str]:
+        """Returns the configured pg_dump options"""
+        return self.config.get('transfer', 'dump_options', fallback='--format=custom --compress=3 --no-owner --no-privileges').split()
+    
+    def _is_custom_format(self, dump_options: List[str]) -> bool:
+        """Checks if the configured dump options produce a custom format archive"""
+        for i, option in enumerate(dump_options):
+            if option in ('-Fc', '-Fcustom', '--format=c', '--format=custom'):
+                return True
+            if option in ('-F', '--format') and i + 1 < len(dump_options):
+                return dump_options[i + 1] in ('c', 'custom')
+        return False
+    
+    def _get_compression_method(self, dump_options: List[str]) -> Optional[str]:
+        """Returns the compression method configured for pg_dump, if any"""
+        method = None
+        for i, option in enumerate(dump_options):
+            if option in ('-Z', '--compress') and i + 1 < len(dump_options):
+                value = dump_options[i + 1]
+            elif option.startswith('--compress='):
+                value = option.partition('=')[2]
+            elif option.startswith('-Z'):
+                value = option[2:]
+            else:
+                continue
+            
+            # Accepts "6", "gzip", "zstd:3", "lz4:level=1" and "none"
+            name = value.partition(':')[0].lower()
+            if name.isdigit():
+                method = 'gzip' if int(name) > 0 else None
+            else:
+                method = None if name == 'none' else name
+        return method
+    
+    def _build_decompress_command(self, dump_options: List[str]) -> Optional[List[str]]:
+        """Builds a decompression stage for compressed plain SQL dumps"""
+        # Custom format archives are decompressed by pg_restore itself
+        if self._is_custom_format(dump_options):
+            return None
+        
+        method = self._get_compression_method(dump_options)
+        if method in ('gzip', 'zstd', 'lz4'):
+            return [method, '-dc']
+        return None
+    
+    def _build_restore_command(self, host_details: Dict, dump_options: List[str], database: str) -> List[str]:
+        """Builds the host-side restore command matching the dump format"""
+        connection_args = [
+            '-h', host_details['host'],
+            '-p', host_details['port'],
+            '-U', host_details['username'],
+            '-d', database
+        ]
+        
+        if self._is_custom_format(dump_options):
+            # pg_restore reads the archive from stdin; --jobs needs a seekable file,
+            # so parallel restore is not available on the streaming path
+            return ['pg_restore'] + connection_args + [
+                '--no-owner', '--no-privileges',
+                '--exit-on-error', '--single-transaction'
+            ]
+        
+        # Plain SQL dumps are replayed by psql in one transaction, stopping at the first error
+        return ['psql'] + connection_args + [
+            '-v', 'ON_ERROR_STOP=1',
+            '--single-transaction',
+            '-c', 'SET synchronous_commit = off;',
+            '-f', '-'
+        ]
+    
+    def _get_staging_name(self) -> str:
+        """Builds a staging database name within PostgreSQL's 63-byte identifier limit"""
+        suffix = f"_transfer_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        
+        # The server silently truncates longer names, which could cut off the suffix and
+        # make the staging name equal the target; shorten the base name instead
+        base = self.selected_database.encode('utf-8')[:63 - len(suffix)].decode('utf-8', errors='ignore')
+        return base + suffix
+    
+    def _run_host_sql(self, host_details: Dict, sql: str, **variables: str) -> subprocess.CompletedProcess:
+        """Runs a script against the host maintenance database, stopping at the first error"""
+        command = [
+            'psql',
+            '-h', host_details['host'],
+            '-p', host_details['port'],
+            '-U', host_details['username'],
+            '-d', 'postgres',
+            '-v', 'ON_ERROR_STOP=1'
+        ]
+        for name, value in variables.items():
+            command += ['-v', f'{name}={value}']
+        
+        # psql only interpolates :'name' variables in script input, not in -c commands
+        return subprocess.run(command + ['-f', '-'], env=host_details['env'], input=sql, capture_output=True, text=True)
+    
+    def _create_dump_file(self, dump_options: List[str]) -> Tuple[BinaryIO, str]:
+        """Creates a new timestamped dump file in the temp directory, readable only by the current user"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = 'dump' if self._is_custom_format(dump_options) else 'sql'
+        safe_name = re.sub(r'[^\w.-]', '_', self.selected_database)
+        
+        # mkstemp creates the file with O_EXCL and mode 0600 under an unpredictable name
+        fd, dump_path = tempfile.mkstemp(prefix=f"{safe_name}_dump_{timestamp}_", suffix=f".{extension}")
+        return os.fdopen(fd, 'wb'), dump_path
+    
+    def _get_dump_errors(self, dump_stderr: str) -> str:
+        """Extracts the error lines from pg_dump output, skipping --verbose progress messages"""
+        error_lines = [line for line in dump_stderr.splitlines() if 'error:' in line.lower()]
+        
+        # Older pg_dump versions and docker itself don't use the "error:" prefix
+        return '\n'.join(error_lines) if error_lines else dump_stderr
+    
+    def _drain_stderr(self, process: subprocess.Popen, errors: List[bytes]) -> threading.Thread:
+        """Collects stderr in a background thread so a chatty process never blocks on a full pipe"""
+        thread = threading.Thread(target=lambda: errors.extend(process.stderr), daemon=True)
+        thread.start()
+        return thread
+    
+    def _run_restore(self, source, host_details: Dict, dump_options: List[str], database: str,
+                     errors: List[bytes]) -> Tuple[Optional[subprocess.Popen], subprocess.Popen]:
+        """Restores a dump read from source (pipe or file) into a host database"""
+        drains = []
+        
+        # Plain SQL dumps written with --compress need an explicit decompression stage
+        decompressor = None
+        decompress_command = self._build_decompress_command(dump_options)
+        if decompress_command:
+            decompressor = subprocess.Popen(
+                decompress_command,
+                stdin=source, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            drains.append(self._drain_stderr(decompressor, errors))
+            source.close()
+            source = decompressor.stdout
+        
+        restorer = subprocess.Popen(
+            self._build_restore_command(host_details, dump_options, database),
+            env=host_details['env'], stdin=source, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        drains.append(self._drain_stderr(restorer, errors))
+        
+        # Close our copy so upstream processes get SIGPIPE if the restore exits early
+        source.close()
+        restorer.wait()
+        if decompressor:
+            decompressor.wait()
+        for drain in drains:
+            drain.join()
+        
+        return decompressor, restorer
+    
     def perform_transfer(self) -> bool:
         """Performs the actual database transfer"""
         # Get host PostgreSQL details
@@ -479,114 +740,122 @@ class PostgreSQLTransfer:
             print("Host connection failed")
             return False
         
-        # Create temporary dump file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        dump_filename = f"{self.selected_database}_dump_{timestamp}.sql"
-        dump_path = os.path.join(tempfile.gettempdir(), dump_filename)
-        
-        try:
-            # Step 1: Dump database from container
-            print("Exporting...")
-            
-            env = os.environ.copy()
-            env['PGPASSWORD'] = self.connection_params['password']
-            
-            dump_options = self.config.get('transfer', 'dump_options', fallback='--no-owner --no-privileges').split()
+        if host_details['database_exists']:
+            print(f"\n{RED}{BOLD}WARNING: Database '{self.selected_database}' already exists!{RESET}")
+            print(f"{RED}This will PERMANENTLY DELETE all existing data!{RESET}")
+            overwrite = input(f"{RED}Overwrite '{self.selected_database}'?{RESET} (y/n): ").strip().lower()
             
-            dump_result = subprocess.run([
-                'docker', 'exec', '-i', self.selected_container['id'],
-                'pg_dump',
-                '-h', self.connection_params['host'],
-                '-p', self.connection_params['port'],
-                '-U', self.connection_params['username'],
-                '-d', self.selected_database
-            ] + dump_options, env=env, capture_output=True, text=True)
-            
-            if dump_result.returncode != 0:
-                print(f"Export failed: {dump_result.stderr}")
+            if overwrite not in ['y', 'yes']:
                 return False
+        
+        # Restore into a staging database; the existing target is only replaced after a successful restore
+        staging_database = self._get_staging_name()
+        staging_created = False
+        transferred = False
+        
+        try:
+            dump_options = self.get_dump_options()
+            dump_command = self._build_source_command('pg_dump', self.selected_database) + dump_options
+            keep_dump = self.config.getboolean('transfer', 'keep_dump', fallback=False)
+            decompressor = restorer = None
             
-            # Write dump to file
-            with open(dump_path, 'w', encoding='utf-8') as f:
-                f.write(dump_result.stdout)
-            
-            # Step 2: Create/check target database on host
-            print("Preparing target...")
-            
-            host_env = os.environ.copy()
-            host_env['PGPASSWORD'] = host_details['password']
+            dump_errors = []
+            restore_errors = []
             
-            # Check if database already exists
-            check_result = subprocess.run([
-                'psql',
-                '-h', host_details['host'],
-                '-p', host_details['port'],
-                '-U', host_details['username'],
-                '-d', 'postgres',
-                '-t', '-c',
-                f"SELECT 1 FROM pg_database WHERE datname='{self.selected_database}';"
-            ], env=host_env, capture_output=True, text=True)
-            
-            if check_result.returncode == 0 and check_result.stdout.strip():
-                # Red color ANSI codes
-                RED = '\033[91m'
-                BOLD = '\033[1m'
-                RESET = '\033[0m'
-                
-                print(f"\n{RED}{BOLD}WARNING: Database '{self.selected_database}' already exists!{RESET}")
-                print(f"{RED}This will PERMANENTLY DELETE all existing data!{RESET}")
-                overwrite = input(f"{RED}Overwrite '{self.selected_database}'?{RESET} (y/n): ").strip().lower()
-                
-                if overwrite not in ['y', 'yes']:
-                    return False
+            if keep_dump:
+                # Write the complete dump to a file before touching the host, keeping it afterwards
+                print("Exporting...")
                 
-                # Drop database
-                drop_result = subprocess.run([
-                    'psql',
-                    '-h', host_details['host'],
-                    '-p', host_details['port'],
-                    '-U', host_details['username'],
-                    '-d', 'postgres',
-                    '-c', f'DROP DATABASE "{self.selected_database}";'
-                ], env=host_env, capture_output=True, text=True)
+                dump_file, dump_path = self._create_dump_file(dump_options)
+                with dump_file:
+                    dumper = subprocess.Popen(dump_command, env=self.connection_params['env'], stdout=dump_file, stderr=subprocess.PIPE)
+                    self._drain_stderr(dumper, dump_errors).join()
+                    dumper.wait()
                 
-                if drop_result.returncode != 0:
-                    print(f"Error dropping database: {drop_result.stderr}")
+                if dumper.returncode != 0:
+                    # Only a partial dump was written
+                    os.remove(dump_path)
+                    print(f"Export failed: {self._get_dump_errors(b''.join(dump_errors).decode('utf-8', errors='replace'))}")
                     return False
+                print(f"Dump kept at {dump_path}")
             
-            # Create new database
-            create_result = subprocess.run([
-                'psql',
-                '-h', host_details['host'],
-                '-p', host_details['port'],
-                '-U', host_details['username'],
-                '-d', 'postgres',
-                '-c', f'CREATE DATABASE "{self.selected_database}";'
-            ], env=host_env, capture_output=True, text=True)
-            
-            if create_result.returncode != 0:
-                print(f"Error creating database: {create_result.stderr}")
-                return False
+            # Step 1: Create staging database on host
+            print("Preparing target...")
             
-            # Step 3: Import dump into host database
-            print("Importing...")
+            # Create it from the pristine template so restored objects don't clash
+            prepare_result = self._run_host_sql(
+                host_details,
+                "SELECT format('CREATE DATABASE %I TEMPLATE template0', :'staging') \\gexec\n",
+                staging=staging_database
+            )
             
-            with open(dump_path, 'r', encoding='utf-8') as f:
-                restore_result = subprocess.run([
-                    'psql',
-                    '-h', host_details['host'],
-                    '-p', host_details['port'],
-                    '-U', host_details['username'],
-                    '-d', self.selected_database
-                ], env=host_env, stdin=f, capture_output=True, text=True)
+            if prepare_result.returncode != 0:
+                print(f"Error preparing database: {prepare_result.stderr}")
+                return False
+            staging_created = True
+            
+            # Step 2: Restore into the staging database
+            if keep_dump:
+                print("Importing...")
+                with open(dump_path, 'rb') as dump_file:
+                    decompressor, restorer = self._run_restore(
+                        dump_file, host_details, dump_options, staging_database, restore_errors
+                    )
+            else:
+                # Stream the dump from the container directly into the staging database
+                print("Transferring...")
+                dumper = subprocess.Popen(dump_command, env=self.connection_params['env'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                dump_drain = self._drain_stderr(dumper, dump_errors)
+                decompressor, restorer = self._run_restore(
+                    dumper.stdout, host_details, dump_options, staging_database, restore_errors
+                )
+                dumper.wait()
+                dump_drain.join()
+            
+            dump_stderr = b''.join(dump_errors).decode('utf-8', errors='replace')
+            restore_stderr = b''.join(restore_errors).decode('utf-8', errors='replace')
+            
+            # Report the restore side first: once it stops at an error, pg_dump dies of a
+            # broken pipe and its own output doesn't explain what went wrong
+            transfer_failed = False
+            
+            if decompressor and decompressor.returncode != 0:
+                print(f"Decompression failed: {restore_stderr}")
+                transfer_failed = True
+            elif restorer and restorer.returncode != 0:
+                print(f"Import failed: {restore_stderr}")
+                transfer_failed = True
+            
+            # A pg_dump killed by that broken pipe (directly, or reported as 128 + SIGPIPE
+            # by docker exec) adds nothing to the restore error
+            broken_pipe = dumper.returncode in (-signal.SIGPIPE, 128 + signal.SIGPIPE)
+            if dumper.returncode != 0 and not (transfer_failed and broken_pipe):
+                print(f"Export failed: {self._get_dump_errors(dump_stderr)}")
+            transfer_failed = transfer_failed or dumper.returncode != 0
+            
+            if transfer_failed:
+                return False
             
-            if restore_result.returncode != 0:
-                print(f"Import completed with warnings: {restore_result.stderr}")
+            # Step 3: Replace the target with the restored staging database
+            finalize_sql = "SELECT format('ALTER DATABASE %I RENAME TO %I', :'staging', :'dbname') \\gexec\n"
+            if host_details['database_exists']:
+                # Drop existing database first, terminating open connections (PostgreSQL 13+)
+                finalize_sql = "SELECT format('DROP DATABASE IF EXISTS %I WITH (FORCE)', :'dbname') \\gexec\n" + finalize_sql
+            
+            # From here on the staging database may hold the only copy of the data, so it is
+            # never dropped, even if the finalize session is interrupted
+            transferred = True
+            finalize_result = self._run_host_sql(
+                host_details, finalize_sql,
+                dbname=self.selected_database, staging=staging_database
+            )
+            
+            if finalize_result.returncode != 0:
+                print(f"Error replacing database: {finalize_result.stderr}")
+                print(f"Restored data is kept in database '{staging_database}'")
+                return False
             
             # Success message in green and bold
-            GREEN = '\033[92m'
-            BOLD = '\033[1m'
-            RESET = '\033[0m'
             print()
             print(f"{GREEN}{BOLD}Transfer completed: {self.selected_database}{RESET}")
             return True
@@ -595,9 +864,13 @@ class PostgreSQLTransfer:
             print(f"Transfer error: {e}")
             return False
         finally:
-            # Cleanup - always executed, even on errors or keyboard interrupt
-            if os.path.exists(dump_path):
-                os.remove(dump_path)
+            # Remove the staging database if anything went wrong; the original target is untouched
+            if staging_created and not transferred:
+                self._run_host_sql(
+                    host_details,
+                    "SELECT format('DROP DATABASE IF EXISTS %I WITH (FORCE)', :'staging') \\gexec\n",
+                    staging=staging_database
+                )
     
     def run(self) -> None:
         """Main program loop"""